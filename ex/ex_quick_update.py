@@ -1,7 +1,7 @@
-from orgo import Orgo
+from trees import Trees
 
-orgo = Orgo()
+trees = Trees()
 tree_filename = 'genre_tree'
-# orgo.utils.gen_id_tree(orgo.utils.read_json(tree_filename), orgo.datapipe.playlists_name_id_pair(), tree_filename)
-tree_ids = orgo.utils.read_json(tree_filename + '_ids')
-orgo.update_playlist_tree(tree_ids)
+# trees.utils.convert_name_tree(trees.utils.read_json(tree_filename), trees.dp.playlists_name_id_pair(), tree_filename)
+tree_ids = trees.utils.read_json(tree_filename + '_ids')
+trees.update_playlist_tree(tree_ids)
@@ -0,0 +1,86 @@
+# Spotify API
+from datapipe import Datapipe
+
+# Constants
+from constants import *
+
+# Miscellaneous
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from datetime import datetime, timedelta
+from threading import Lock
+
+
+class ArtistGraph:
+    """ Crawls the related artists graph, caching every artist's related artists (edges) on disk
+        so repeat crawls over overlapping artists reuse them instead of calling the API again. """
+
+    def __init__(self, dp: Datapipe, cache_file: str = ARTIST_GRAPH_CACHE_FILE, ttl: int = ARTIST_GRAPH_TTL):
+        self.dp = dp
+        self.utils = dp.utils
+        self.cache_file = cache_file
+        self.ttl = timedelta(seconds=ttl)
+        self.lock = Lock()  # guards the edges dict while worker threads fill it
+        self.edges = self.load_edges()  # {artist ID: {'fetched': isostring, 'related': [artist IDs]}}
+
+    # === EDGE CACHE ===
+    def load_edges(self) -> dict:
+        """ Loads the cached edges from JSON, dropping any that have gone stale. """
+        if self.utils.json_file_exists(self.cache_file) is False:
+            return {}
+        edges = self.utils.read_json(self.cache_file)
+        return {artist: edge for artist, edge in edges.items() if self.is_fresh(edge)}
+
+    def save_edges(self):
+        """ Dumps the cached edges to JSON so the next run can reuse them. """
+        with self.lock:
+            self.utils.write_json(self.cache_file, self.edges, indent=None)
+
+    def is_fresh(self, edge: dict) -> bool:
+        """ Checks if a cached edge was fetched within the TTL. """
+        return datetime.utcnow() - self.utils.convert_from_isostring(edge['fetched']) < self.ttl
+
+    def related(self, artist_id: str) -> list[str]:
+        """ Returns the artist's related artists, from the cache if fresh, else from the API. """
+        with self.lock:
+            edge = self.edges.get(artist_id)
+        if edge is not None and self.is_fresh(edge):
+            return edge['related']
+
+        related = self.dp.get_related_artists(artist_id)
+        with self.lock:
+            self.edges[artist_id] = {'fetched': self.utils.convert_to_isostring(datetime.utcnow()), 'related': related}
+        return related
+
+    # === CRAWLING ===
+    def crawl(self, seeds: list[str], depth: int = 1, breadth: int = 20) -> Counter:
+        """
+        Breadth first crawl of the related artists graph starting from the seed artists.
+
+        Args:
+            seeds (list): Artist IDs to start crawling from
+            depth (int): How many levels of related artists to follow
+            breadth (int): How many related artists to follow per artist
+
+        Returns:
+            Counter: How many times each artist showed up as a related artist during the crawl
+        """
+        counts = Counter()
+        visited = set(seeds)
+        frontier = list(visited)
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for _ in range(depth):
+                next_frontier = []
+                # fetch the whole level concurrently and count each artist's related artists as they come in
+                futures = [executor.submit(self.related, artist) for artist in frontier]
+                for future in as_completed(futures):
+                    related = future.result()[:breadth]
+                    counts.update(related)
+                    for artist in related:
+                        if artist not in visited:
+                            visited.add(artist)
+                            next_frontier.append(artist)
+                frontier = next_frontier
+
+        return counts
@@ -0,0 +1,107 @@
+from constants import SERVICE_PORT
+import argparse
+import json
+
+""" Lightweight command line entry point for SpotifyTrees.
+    Read-only commands (locate, topheavy) run off the cached playlist tracks by default,
+    so they never import Spotipy or touch the API unless --live is passed. """
+
+
+def load_tree(tree_filename: str) -> dict:
+    """ Loads an ID tree from JSON (filename without .json). """
+    with open(tree_filename + '.json', 'r') as in_file:
+        return json.load(in_file)
+
+
+def maintain(live: bool):
+    """ Returns a Maintain on the shared datapipe, reading from the cache unless live. """
+    from session import get_datapipe
+    from maintain_trees import Maintain
+    return Maintain(get_datapipe(offline=not live))
+
+
+# === COMMANDS ===
+def update(args):
+    """ Pushes newly added tracks up the tree. """
+    maintain(live=True).update_playlist_tree(load_tree(args.tree))
+
+
+def bootstrap(args):
+    """ Creates missing playlists and writes the ID and link trees from a name tree. """
+    maintain(live=True).bootstrap_tree(args.tree, args.duplicates)
+
+
+def cache(args):
+    """ Caches every playlist's tracks in the tree so read-only commands can run offline. """
+    mt = maintain(live=True)
+    for playlist in mt.utils.tree_playlists(load_tree(args.tree)):
+        mt.dp.cache_playlist_tracks(playlist, mt.dp.get_playlist_tracks(playlist))
+
+
+def dedup(args):
+    """ Removes the extra copies of repeated tracks in every playlist of the tree. """
+    print(json.dumps(maintain(live=True).dedup_tree(load_tree(args.tree)), indent=4))
+
+
+def locate(args):
+    """ Prints every playlist each track was found in. """
+    print(json.dumps(maintain(args.live).locate_songs(args.tracks, load_tree(args.tree)), indent=4))
+
+
+def topheavy(args):
+    """ Prints the tracks missing from every playlist below each parent. """
+    _, subtree = maintain(args.live).check_topheavy(load_tree(args.tree))
+    print(json.dumps(subtree, indent=4))
+
+
+def serve(args):
+    """ Runs the local job service so everyone sharing a tree goes through one queue and cache. """
+    from session import get_datapipe
+    import service
+    service.serve(args.host, args.port, get_datapipe())
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(prog='spotify_trees', description='Manage Spotify playlist trees.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    cmd = commands.add_parser('update', help='push newly added tracks up the tree')
+    cmd.add_argument('tree', help='ID tree filename (without .json)')
+    cmd.set_defaults(func=update)
+
+    cmd = commands.add_parser('bootstrap', help='create missing playlists and write the ID and link trees')
+    cmd.add_argument('tree', help='name tree filename (without .json)')
+    cmd.add_argument('--duplicates', choices=['first', 'last', 'error'], default='first',
+                     help='which playlist to use when several share a name')
+    cmd.set_defaults(func=bootstrap)
+
+    cmd = commands.add_parser('cache', help='cache the tracks of every playlist in the tree')
+    cmd.add_argument('tree', help='ID tree filename (without .json)')
+    cmd.set_defaults(func=cache)
+
+    cmd = commands.add_parser('dedup', help='remove repeated tracks from every playlist in the tree')
+    cmd.add_argument('tree', help='ID tree filename (without .json)')
+    cmd.set_defaults(func=dedup)
+
+    cmd = commands.add_parser('locate', help='find every playlist the given tracks are in')
+    cmd.add_argument('tree', help='ID tree filename (without .json)')
+    cmd.add_argument('tracks', nargs='+', help='track IDs to locate')
+    cmd.add_argument('--live', action='store_true', help='read from the API instead of the cache')
+    cmd.set_defaults(func=locate)
+
+    cmd = commands.add_parser('topheavy', help='find tracks missing from every playlist below their parent')
+    cmd.add_argument('tree', help='ID tree filename (without .json)')
+    cmd.add_argument('--live', action='store_true', help='read from the API instead of the cache')
+    cmd.set_defaults(func=topheavy)
+
+    cmd = commands.add_parser('serve', help='run the local job service')
+    cmd.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    cmd.add_argument('--port', type=int, default=SERVICE_PORT, help='port to listen on')
+    cmd.set_defaults(func=serve)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
 GET_MAX = DEL_MAX = 50
-ADD_MAX = 100
+ADD_MAX = REMOVE_MAX = 100
 
 PLAYLIST_CACHE_PATH = 'playlist tracks cache'
+TOKEN_CACHE_PATH = '.spotify_token_cache'
+ARTIST_GRAPH_CACHE_FILE = 'artist_graph_cache'
+ARTIST_GRAPH_TTL = 60 * 60 * 24 * 7  # how long cached related artists stay fresh (seconds)
+LIBRARY_CACHE_FILE = 'library_cache'
+LIBRARY_CACHE_TTL = 60 * 60 * 24  # how long cached saved/unsaved checks stay fresh (seconds)
+
+MAX_WORKERS = 8  # threads used for concurrent API calls
+
+SERVICE_PORT = 8765
+SERVICE_CACHE_TTL = 60 * 5  # how long the job service serves read-only queries from its warm cache (seconds)
 
 SCOPES = [
     "playlist-modify-private",
@@ -11,5 +21,5 @@ SCOPES = [
     "user-read-playback-state",
     "user-read-playback-position",
     "user-library-modify",
-    # "user-library-read"
+    "user-library-read"
 ]
@@ -1,15 +1,11 @@
-from datapipe import Datapipe
-from constants import *
-from utils import Utils
-from creds import *
+from session import get_datapipe
 import pprint
 
 """ Script to convert Spotify tree of names into tree of IDs. """
 
 if __name__ == "__main__":
-    dp = Datapipe(CLIENT_ID, CLIENT_SECRET, SPOTIPY_REDIRECT_URI, SCOPES)
-    sp = dp.sp
-    ut = Utils(dp.sp)
+    dp = get_datapipe()
+    ut = dp.utils
     pp = pprint.PrettyPrinter().pprint
 
     name_tree_filename = "edm_tree222"  # TODO: FILL HERE
@@ -1,13 +1,12 @@
-# Spotify API
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-
 # Utils & Constants
 from utils import Utils
 from constants import *
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import cache
+from os import path
+from threading import Lock
 import os, shutil
 
 
@@ -15,17 +14,28 @@ class Datapipe:
     """ Wrapper that makes it clean and easy to retrieve Spotify data.
         (avoids you having you to deal with the mess of JSON data) """
 
-    def __init__(self, client_id, client_secret, redirect_uri, scopes):
-        self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-            client_id=client_id,
-            client_secret=client_secret,
-            redirect_uri=redirect_uri,
-            scope=scopes
-        ))
-        self.utils = Utils(self.sp)
+    def __init__(self, client_id, client_secret, redirect_uri, scopes, offline: bool = False):
+        self.auth = {'client_id': client_id, 'client_secret': client_secret, 'redirect_uri': redirect_uri, 'scope': scopes}
+        self.offline = offline  # when set, playlist tracks are read from the cache instead of the API
+        self._sp = None  # Spotipy client gets created on first use (see sp below)
+        self._sp_lock = Lock()  # so worker threads touching sp first don't each build their own client
+        self.utils = Utils(lambda: self.sp)
+
+    @property
+    def sp(self):
+        """ Spotipy client, spotipy only gets imported and authed the first time this is accessed. """
+        if self._sp is None:
+            with self._sp_lock:
+                if self._sp is None:  # checks again incase another thread built it while we waited
+                    import spotipy
+                    from spotipy.oauth2 import SpotifyOAuth
+                    # reuses the same token cache file every run so the token only gets refreshed when it expires
+                    self._sp = spotipy.Spotify(auth_manager=SpotifyOAuth(cache_path=TOKEN_CACHE_PATH, **self.auth))
+        return self._sp
 
+    @cache
     def my_id(self) -> str:
-        """ Returns ID of user logged into the API. """
+        """ Returns ID of user logged into the API (only asks the API once). """
         return self.sp.current_user()['id']
 
     # === USER PLAYLISTS ===
@@ -61,8 +71,11 @@ class Datapipe:
 
         return playlists
 
-    def playlists_name_id_pair(self) -> dict[str: str]:
-        """ Returns a dict of name ID pairs for all of the user's playlists. """
+    def playlists_name_id_pair(self, duplicate_policy: str = 'prompt') -> dict[str: str]:
+        """ Returns a dict of name ID pairs for all of the user's playlists.
+            Duplicate names are settled by the policy: 'prompt' asks, 'first'/'last' keep that one, 'error' raises. """
+        if duplicate_policy not in ('prompt', 'first', 'last', 'error'):
+            raise ValueError('expected prompt, first, last, or error duplicate policy, got: ' + str(duplicate_policy))
         results = self.sp.current_user_playlists()  # initial API call
         playlists = {}
 
@@ -71,6 +84,13 @@ class Datapipe:
             for plist in results['items']:  # iterate every playlist in result
                 if plist['name'] in playlists:  # checks if duplicate playlist name was found
                     prev = playlists[plist['name']]  # grabs existing playlist's ID
+                    if duplicate_policy == 'first':  # keep previous (existing) playlist ID: do nothing
+                        continue
+                    elif duplicate_policy == 'last':  # use the newly found playlist ID: replace ID
+                        playlists[plist['name']] = plist['id']
+                        continue
+                    elif duplicate_policy == 'error':
+                        raise ValueError(f"playlist \"{plist['name']}\" found with both ID \"{prev}\" and ID \"{plist['id']}\"")
                     # present option to decide between both playlists to user
                     print(f"playlist \"{plist['name']}\" already exists with ID \"{prev}\" (P) yet same name was found with ID \"{plist['id']}\" (N)")
                     while True:
@@ -115,6 +135,12 @@ class Datapipe:
         """ Creates a new playlist with given name and returns the new playlist's ID. """
         return self.sp.user_playlist_create(self.my_id(), playlist_name)['id']
 
+    def new_playlists(self, playlist_names: list[str]) -> dict[str: str]:
+        """ Creates a new playlist for each given name concurrently and returns a dict of their name ID pairs. """
+        self.my_id()  # grab the user ID once up front so the threads all share it
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            return dict(zip(playlist_names, executor.map(self.new_playlist, playlist_names)))
+
     def add_playlist_tracks(self, playlist_id: str, tracks: list):
         """ Adds the given tracks to the given playlist. """
         tracks_chunks = self.utils.divide_chunks(tracks, ADD_MAX)
@@ -122,10 +148,42 @@ class Datapipe:
         for chunk in tracks_chunks:
             self.sp.playlist_add_items(playlist_id, chunk)
 
+    # === USER LIBRARY ===
+    def tracks_saved(self, tracks: list[str]) -> list[bool]:
+        """ Returns whether each of the given tracks is in the user's Liked Songs (max 50 tracks per call). """
+        return self.sp.current_user_saved_tracks_contains(tracks)
+
+    def remove_playlist_positions(self, playlist_id: str, snapshot_id: str, positions: list[tuple[str, int]]) -> tuple[str, int]:
+        """
+        Removes the tracks at the given positions from the playlist, pinned to the given snapshot.
+
+        Args:
+            playlist_id (str): ID of the playlist being removed from
+            snapshot_id (str): Snapshot of the playlist the positions are from
+            positions (list): (track ID, position) pairs to remove
+
+        Returns:
+            tuple: The playlist's new snapshot ID and how many request bytes were sent
+        """
+        # goes from the bottom of the playlist up so removing a chunk never shifts the positions of the next chunk
+        positions = sorted(positions, key=lambda pair: pair[1], reverse=True)
+        bytes_sent = 0
+        for chunk in self.utils.divide_chunks(positions, REMOVE_MAX):
+            items = {}  # groups the chunk's positions by track
+            for track_id, pos in chunk:
+                items.setdefault(track_id, []).append(pos)
+            items = [{'uri': 'spotify:track:' + track_id, 'positions': pos} for track_id, pos in items.items()]
+            bytes_sent += self.utils.payload_size(items, snapshot_id)
+            snapshot_id = self.sp.playlist_remove_specific_occurrences_of_items(playlist_id, items, snapshot_id)['snapshot_id']
+        return snapshot_id, bytes_sent
+
     # === PLAYLIST CONTENTS ===
     @cache
     def get_playlist_tracks(self, playlist_id: str) -> list[str]:
         """ Returns all the tracks (IDs) in the given playlist. """
+        if self.offline is True:  # no API calls when offline, read from the cache instead
+            return self.load_cached_playlist_tracks(playlist_id)
+
         results = self.sp.playlist_tracks(playlist_id)  # initial API call
         tracks = []
 
@@ -143,6 +201,33 @@ class Datapipe:
 
         return tracks
 
+    def get_playlist_duplicates(self, playlist_id: str) -> tuple[str, dict[str: list]]:
+        """ Returns the playlist's snapshot ID and every track that's in it more than once paired with the positions
+            of its extra copies (the first copy is kept), all from one pass over the playlist. """
+        playlist = self.sp.playlist(playlist_id, fields='snapshot_id,tracks.items(track(id)),tracks.next')  # initial API call
+        results = playlist['tracks']
+        seen = set()
+        duplicates = {}
+        position = 0  # position of the current track in the playlist
+
+        # define nested function to record the positions of repeated IDs from current page of results
+        def nested():
+            nonlocal position
+            for track in results['items']:
+                track_id = track['track']['id'] if track['track'] is not None else None
+                if track_id in seen:
+                    duplicates.setdefault(track_id, []).append(position)
+                elif track_id is not None:
+                    seen.add(track_id)
+                position += 1
+
+        nested()  # extract from initial results
+        while results['next']:  # page as long as there are more results
+            results = self.sp.next(results)
+            nested()  # extract duplicates from paged results
+
+        return playlist['snapshot_id'], duplicates
+
     def get_playlist_track_names(self, playlist_id: str) -> list[str]:
         """ Returns all the tracks (names) in the given playlist. """
         results = self.sp.playlist_tracks(playlist_id)  # initial API call
@@ -192,10 +277,15 @@ class Datapipe:
 
         return list(artists)
 
+    # === ARTISTS ===
+    def get_related_artists(self, artist_id: str) -> list[str]:
+        """ Returns the related artists (IDs) of the given artist. """
+        return [artist['id'] for artist in self.sp.artist_related_artists(artist_id)['artists']]
+
     # === CACHE API CALLS ===
     def initialize_playlist_tracks_cache(self):
         """ Initialize cache location by making the folder to store the cached playlist tracks. """
-        os.makedirs(PLAYLIST_CACHE_PATH)
+        os.makedirs(PLAYLIST_CACHE_PATH, exist_ok=True)
 
     def destroy_playlist_tracks_cache(self):
         """ Initialize cache location by making the folder to store the cached playlist tracks. """
@@ -204,7 +294,7 @@ class Datapipe:
     def get_playlist_tracks_cached(self, playlist_id: str) -> list[str]:
         """ Wrapper that caches calls to get playlist tracks. """
         # if file with playlist tracks already exists, returns cached data
-        if self.utils.json_file_exists(playlist_id) is True:
+        if self.utils.json_file_exists(path.join(PLAYLIST_CACHE_PATH, playlist_id)) is True:
             playlist_tracks = self.load_cached_playlist_tracks(playlist_id)
         # else makes the API call for the first time and caches the data before returning it
         else:
@@ -214,26 +304,9 @@ class Datapipe:
 
     def cache_playlist_tracks(self, playlist_id: str, playlist_tracks: list[str]):
         """ Dumps playlists tracks to JSON file to cache them. """
-        self.utils.write_json(playlist_id, {'id': playlist_id, 'tracks': playlist_tracks})
+        self.initialize_playlist_tracks_cache()
+        self.utils.write_json(path.join(PLAYLIST_CACHE_PATH, playlist_id), {'id': playlist_id, 'tracks': playlist_tracks})
 
     def load_cached_playlist_tracks(self, playlist_id: str) -> list[str]:
         """ Loads cached playlist tracks from JSON file and returns them. """
-        return self.utils.read_json(playlist_id)['tracks']
-
-    # def get_unsaved_tracks(self, playlist_id: str) -> dict:
-    #     """ Finds out what songs in a playlist are not saved and returns a dict of track IDs and corresponding booleans.
-    #     # FIXME: shorten that docstring maybe ^^ """
-    #     playlist_tracks = self.get_playlist_tracks(playlist_id)
-    #     if len(playlist_tracks) > GET_MAX:  # can only check 50 songs at a time
-    #         tracks_exist = []
-    #         tracks_chunks = self.utils.divide_chunks(playlist_tracks, GET_MAX)  # generator
-    #         for chunk in tracks_chunks:
-    #             tracks_exist.extend(self.sp.current_user_saved_tracks_contains(chunk))  # checks if these tracks are saved
-    #     else:
-    #         # list of booleans representing whether each track is saved or not
-    #         tracks_exist = self.sp.current_user_saved_tracks_contains(playlist_tracks)
-
-    #     # creates dict by zipping 2 lists together into key-value pairs
-    #     resultant = dict(zip(playlist_tracks, tracks_exist))  # B)
-
-    #     return resultant
+        return self.utils.read_json(path.join(PLAYLIST_CACHE_PATH, playlist_id))['tracks']
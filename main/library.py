@@ -0,0 +1,94 @@
+# Spotify API
+from datapipe import Datapipe
+
+# Constants
+from constants import *
+
+# Miscellaneous
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+class Library:
+    """ Checks which tracks in the playlist tree are saved in the user's Liked Songs.
+        Tracks are deduped across the whole tree first so tracks shared between playlists only get checked once,
+        and each result is cached on disk until it goes stale or gets invalidated. """
+
+    def __init__(self, dp: Datapipe, cache_file: str = LIBRARY_CACHE_FILE, ttl: int = LIBRARY_CACHE_TTL):
+        self.dp = dp
+        self.utils = dp.utils
+        self.cache_file = cache_file
+        self.ttl = timedelta(seconds=ttl)
+        self.saved = self.load_saved()  # {track ID: {'checked': isostring, 'saved': bool}}
+
+    # === SAVED CACHE ===
+    def load_saved(self) -> dict:
+        """ Loads the cached saved checks from JSON, dropping any that have gone stale. """
+        if self.utils.json_file_exists(self.cache_file) is False:
+            return {}
+        saved = self.utils.read_json(self.cache_file)
+        return {track: check for track, check in saved.items() if self.is_fresh(check)}
+
+    def save_saved(self):
+        """ Dumps the cached saved checks to JSON so the next run can reuse them. """
+        self.utils.write_json(self.cache_file, self.saved, indent=None)
+
+    def is_fresh(self, check: dict) -> bool:
+        """ Checks if a cached saved check was made within the TTL. """
+        return datetime.utcnow() - self.utils.convert_from_isostring(check['checked']) < self.ttl
+
+    def invalidate(self, tracks: list[str] = None):
+        """ Forgets the cached checks for the given tracks (or every track if none are given). """
+        if tracks is None:
+            self.saved.clear()
+        else:
+            for tr in tracks:
+                self.saved.pop(tr, None)
+
+    # === CHECKING ===
+    def check_saved(self, tracks: list[str]) -> dict[str: bool]:
+        """ Returns whether each of the given tracks is saved, only asking the API about uncached tracks. """
+        unchecked = [tr for tr in dict.fromkeys(tracks) if tr not in self.saved or not self.is_fresh(self.saved[tr])]
+
+        # fire off the 50 track batches concurrently
+        chunks = list(self.utils.divide_chunks(unchecked, GET_MAX))
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = executor.map(self.dp.tracks_saved, chunks)
+
+        checked = self.utils.convert_to_isostring(datetime.utcnow())
+        for chunk, saved in zip(chunks, results):
+            for tr, is_saved in zip(chunk, saved):
+                self.saved[tr] = {'checked': checked, 'saved': is_saved}
+
+        return {tr: self.saved[tr]['saved'] for tr in tracks}
+
+    def unsaved_tracks_report(self, id_tree: dict) -> dict[str: list]:
+        """
+        Finds the tracks in every playlist of the tree that aren't saved in the user's Liked Songs.
+
+        Args:
+            id_tree (dict): Tree of playlist IDs to check
+
+        Returns:
+            dict: Playlist IDs paired with a list of their unsaved tracks::
+
+                {
+                    "694CE0Y64KwrjCXKShiCES": [
+                        "0U0ldCRmgCqhVvD6ksG63j",
+                        "..."
+                    ],
+                    "...": [...]
+                }
+        """
+        playlists = self.utils.tree_playlists(id_tree)
+
+        # pull every playlist's tracks concurrently
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            playlist_tracks = dict(zip(playlists, executor.map(self.dp.get_playlist_tracks, playlists)))
+
+        # dedup tracks across the whole tree so shared tracks only get checked once
+        all_tracks = list(dict.fromkeys(tr for tracks in playlist_tracks.values() for tr in tracks))
+        saved = self.check_saved(all_tracks)
+        self.save_saved()
+
+        return {plist: [tr for tr in tracks if saved[tr] is False] for plist, tracks in playlist_tracks.items()}
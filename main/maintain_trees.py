@@ -1,13 +1,12 @@
 # Spotify API
-from datapipe import Datapipe
 from trees import Trees
-import spotipy
+from artist_graph import ArtistGraph
 
-# Constants & Creds
+# Constants
 from constants import *
-from creds import *
 
 # Miscellaneous
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
@@ -15,12 +14,6 @@ class Maintain(Trees):
     """ Subclass of Tree for functions for helping maintain and fix the tree (like topheavy stuff).
         I'm subclassing it to separate the code a bit and keep it cleaner, same way I subclass in Minesweeper. """
 
-    def __init__(self):
-        # Spotipy is initialized in datapipe because it handles the API/data stuff
-        self.dp = Datapipe(CLIENT_ID, CLIENT_SECRET, SPOTIPY_REDIRECT_URI, SCOPES)
-        self.sp = self.dp.sp  # pull Spotipy instance out incase we need to make direct calls
-        self.utils = self.dp.utils  # use the same instance of utils in both datapipe and trees
-
     # === MAINTAINING PLAYLIST TREE ===
     def check_topheavy(self, nodes: dict) -> tuple:
         """
@@ -71,7 +64,7 @@ class Maintain(Trees):
                 self.utils.filter_null(parent_tracks)
 
                 # [3] find difference in playlists
-                difference = self.utils.filter_items(parent_tracks, child_tracks)  # get every song in this playlist that's not below this playlist
+                difference = self.utils.filter_items(parent_tracks, set(child_tracks))  # get every song in this playlist that's not below this playlist
 
                 # [4] record difference tracks
                 subtree[k] = {'missing tracks': difference, 'child playlists': child_subtree}
@@ -81,6 +74,66 @@ class Maintain(Trees):
 
         return accum_tracks, subtree
 
+    # === DUPLICATES ===
+    def dedup_tree(self, id_tree: dict) -> dict:
+        """
+        Removes the extra copies of tracks that are in a playlist more than once, for every playlist in the tree.
+
+        Args:
+            id_tree (dict): Tree of playlist IDs to dedup
+
+        Returns:
+            dict: Totals of what was removed and how many requests/bytes batching saved
+                compared to sending one remove request per extra copy::
+
+                {
+                    "duplicates removed": 12,
+                    "requests": 3,
+                    "requests saved": 9,
+                    "bytes saved": 1024,
+                    "playlists": {"694CE0Y64KwrjCXKShiCES": 4, "...": ...}
+                }
+        """
+        playlists = list(dict.fromkeys(self.utils.tree_playlists(id_tree)))
+
+        # dedup the playlists concurrently (each playlist's own removals still go one after another)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = dict(zip(playlists, executor.map(self.dedup_playlist, playlists)))
+
+        self.dp.get_playlist_tracks.cache_clear()  # playlists changed so the cached tracks are stale
+
+        report = {'duplicates removed': 0, 'requests': 0, 'requests saved': 0, 'bytes saved': 0, 'playlists': {}}
+        for plist, result in results.items():
+            for key in ('duplicates removed', 'requests', 'requests saved', 'bytes saved'):
+                report[key] += result[key]
+            if result['duplicates removed'] > 0:
+                report['playlists'][plist] = result['duplicates removed']
+
+        print(f"removed {report['duplicates removed']} duplicates from {len(report['playlists'])} playlists "
+              f"({report['requests saved']} requests and {report['bytes saved']} bytes saved by batching)")
+        return report
+
+    def dedup_playlist(self, playlist_id: str) -> dict:
+        """ Removes the extra copies of repeated tracks in the playlist and returns what it took (see dedup_tree). """
+        snapshot_id, duplicates = self.dp.get_playlist_duplicates(playlist_id)
+        positions = [(track_id, pos) for track_id, extra in duplicates.items() for pos in extra]
+        if len(positions) == 0:
+            return {'duplicates removed': 0, 'requests': 0, 'requests saved': 0, 'bytes saved': 0}
+
+        _, bytes_sent = self.dp.remove_playlist_positions(playlist_id, snapshot_id, positions)
+        requests = len(range(0, len(positions), REMOVE_MAX))
+
+        # what it would've taken to remove every extra copy with its own request
+        naive_bytes = sum(self.utils.payload_size([{'uri': 'spotify:track:' + track_id, 'positions': [pos]}], snapshot_id)
+                          for track_id, pos in positions)
+
+        return {
+            'duplicates removed': len(positions),
+            'requests': requests,
+            'requests saved': len(positions) - requests,
+            'bytes saved': naive_bytes - bytes_sent
+        }
+
     # == playlist math
     def subtract_chunk(self, playlist_id: str, chunk: list):
         """
@@ -144,11 +197,39 @@ class Maintain(Trees):
     # but I'm not sure if that works or I have to do it separately
 
     # === RANDOM COOL THING ===
-    def cross_related_artists(self):
+    def cross_related_artists(self, id_tree: dict, depth: int = 1, breadth: int = 20, top: int = 20) -> dict:
         """
             Goes through many artists and gets their related artists,
                 then crosses all the artists and returns list of most
                 seen artists across the pool of related artists and
                 sorts them by frequency.
+
+        Args:
+            id_tree (dict): Tree of playlist IDs, every leaf playlist gets crossed
+            depth (int): How many levels of related artists to crawl
+            breadth (int): How many related artists to follow per artist
+            top (int): How many of the most seen artists to return per leaf
+
+        Returns:
+            dict: Leaf playlist IDs paired with a list of (artist ID, times seen) tuples,
+                most seen first and skipping artists already in the playlist
         """
-        self.sp.artist_related_artists()
+        graph = ArtistGraph(self.dp)
+        leaves = self.utils.tree_leaves(id_tree)
+
+        # grab every leaf's artists concurrently to seed the crawls
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            leaf_artists = dict(zip(leaves, executor.map(self.dp.get_playlist_artists, leaves)))
+
+        crossed = {}
+        try:
+            for leaf, artists in leaf_artists.items():
+                seeds = self.utils.filter_null(artists)
+                counts = graph.crawl(seeds, depth, breadth)
+                for artist in seeds:  # don't suggest artists that are already in the playlist
+                    counts.pop(artist, None)
+                crossed[leaf] = counts.most_common(top)
+        finally:
+            graph.save_edges()  # keep whatever was fetched, even if the crawl got cut off
+
+        return crossed
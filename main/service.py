@@ -0,0 +1,201 @@
+# Spotify API
+from datapipe import Datapipe
+from maintain_trees import Maintain
+
+# Constants
+from constants import *
+
+# Miscellaneous
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from urllib.parse import parse_qs, urlparse
+from os import path
+import json
+import time
+
+""" Small local HTTP service that queues tree operations for everyone sharing a tree.
+    Identical read-only queries that come in while one is already running join it instead of running again
+    and share one warm playlist tracks cache, identical writes only join one that hasn't started yet,
+    and writes to the same tree run one at a time on that tree's own queue. """
+
+
+class JobService:
+    """ Queues tree operations, coalescing identical ones and serializing writes per tree. """
+
+    def __init__(self, dp: Datapipe = None, cache_ttl: int = SERVICE_CACHE_TTL):
+        self.mt = Maintain(dp)
+        self.dp = self.mt.dp
+        self.utils = self.mt.utils
+        self.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        self.lock = Lock()  # guards the in flight jobs, write queues and generation
+        self.inflight = {}  # read jobs currently queued or running (job key: Future)
+        self.pending_writes = {}  # write jobs queued but not started yet (job key: Future)
+        self.write_queues = {}  # one single thread executor per tree so its writes run one at a time (tree filename: executor)
+        self.generation = 0  # bumped when any write starts or finishes, so reads overlapping a write know their cache is stale
+        self.cache_ttl = cache_ttl
+        self.warmed = time.monotonic()  # when the shared playlist tracks cache was last cleared
+
+    # === JOB QUEUE ===
+    def submit(self, key: tuple, func, *args) -> Future:
+        """ Queues a read job, or returns the already queued job if an identical one hasn't finished yet. """
+        with self.lock:
+            if key in self.inflight:
+                return self.inflight[key]
+            future = self.executor.submit(self.read, func, *args)
+            self.inflight[key] = future
+
+        def done(_):
+            with self.lock:
+                self.inflight.pop(key, None)
+
+        future.add_done_callback(done)
+        return future
+
+    def submit_write(self, key: tuple, tree_filename: str, func) -> Future:
+        """
+        Queues a write job on the tree, or returns the identical write job if it's queued and hasn't started yet.
+        Once a write has started reading the tree it won't see anything added after, so identical requests that
+        come in while it's running get a follow-up run queued behind it instead of joining it.
+        Writes go through the tree's own single thread queue, so waiting writes never hold up the read workers.
+        """
+        with self.lock:
+            if key in self.pending_writes:
+                return self.pending_writes[key]
+            future = Future()
+            self.pending_writes[key] = future
+            queue = self.write_queues.setdefault(tree_filename, ThreadPoolExecutor(max_workers=1))
+
+        def run():
+            with self.lock:  # started now, so later identical requests queue a new run
+                if self.pending_writes.get(key) is future:
+                    self.pending_writes.pop(key)
+            if future.set_running_or_notify_cancel() is False:
+                return
+            try:
+                future.set_result(self.write(tree_filename, func))
+            except Exception as e:
+                future.set_exception(e)
+
+        queue.submit(run)
+        return future
+
+    # === WARM CACHE ===
+    def expire_cache(self, force: bool = False):
+        """ Clears the shared playlist tracks cache if it's older than the TTL (or if forced after a write). """
+        if force is True or time.monotonic() - self.warmed > self.cache_ttl:
+            self.dp.get_playlist_tracks.cache_clear()
+            self.warmed = time.monotonic()
+
+    def bump_generation(self):
+        """ Marks that a write started or finished. """
+        with self.lock:
+            self.generation += 1
+
+    def read(self, func, *args):
+        """ Runs a read job off the warm cache. If a write started or finished while it ran, whatever it cached
+            may be from before the write, so the cache gets cleared instead of serving that until the TTL. """
+        self.expire_cache()
+        generation = self.generation
+        try:
+            return func(*args)
+        finally:
+            if self.generation != generation:
+                self.expire_cache(force=True)
+
+    # === OPERATIONS ===
+    def locate(self, tree_filename: str, tracks: list[str]) -> Future:
+        """ Queues a locate query (read-only). """
+        def run():
+            return self.mt.locate_songs(tracks, self.utils.read_json(tree_filename))
+        return self.submit(('locate', tree_filename, tuple(sorted(tracks))), run)
+
+    def topheavy(self, tree_filename: str) -> Future:
+        """ Queues a top-heavy check (read-only). """
+        def run():
+            return self.mt.check_topheavy(self.utils.read_json(tree_filename))[1]
+        return self.submit(('topheavy', tree_filename), run)
+
+    def update(self, tree_filename: str) -> Future:
+        """ Queues a tree update (write). """
+        def update(id_tree: dict):
+            return self.mt.update_playlist_tree(id_tree, self.time_checked_file(tree_filename))
+        return self.submit_write(('update', tree_filename), tree_filename, update)
+
+    def dedup(self, tree_filename: str) -> Future:
+        """ Queues a tree dedup (write). """
+        return self.submit_write(('dedup', tree_filename), tree_filename, self.mt.dedup_tree)
+
+    def write(self, tree_filename: str, func):
+        """ Runs a write on the tree (from its write queue), then clears the cache since playlists changed.
+            (writes stream playlists straight from the API, so they never read the cache themselves) """
+        self.bump_generation()
+        try:
+            return func(self.utils.read_json(tree_filename))
+        finally:
+            self.bump_generation()
+            self.expire_cache(force=True)
+
+    def time_checked_file(self, tree_filename: str) -> str:
+        """ Returns the tree's own time checked file, so updating one tree doesn't move another's time forward.
+            (first time it's seeded from the shared time checked file) """
+        filename = tree_filename + '_time_checked'
+        if self.utils.json_file_exists(filename) is False:
+            self.mt.record_time_checked(self.mt.get_time_checked(), filename)
+        return filename
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    """ Routes HTTP requests to the job service. (GET for read-only queries, POST for writes) """
+
+    service: JobService = None  # set by serve()
+
+    def do_GET(self):
+        self.route({'/locate': self.service.locate, '/topheavy': self.service.topheavy})
+
+    def do_POST(self):
+        self.route({'/update': self.service.update, '/dedup': self.service.dedup})
+
+    def route(self, routes: dict):
+        """ Runs the job for the requested path and responds with its result as JSON. """
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path not in routes:
+            return self.respond(404, {'error': 'unknown path: ' + url.path})
+        if 'tree' not in query:
+            return self.respond(400, {'error': 'missing tree parameter'})
+
+        tree = query['tree'][0]
+        if tree in ('', '.', '..') or path.basename(tree) != tree or '\\' in tree:  # only trees in the service's folder
+            return self.respond(400, {'error': 'tree must be a plain filename, got: ' + tree})
+
+        args = [tree]
+        if url.path == '/locate':
+            args.append(query.get('track', []))
+
+        try:
+            self.respond(200, routes[url.path](*args).result())
+        except Exception as e:
+            self.respond(500, {'error': str(e)})
+
+    def respond(self, status: int, data):
+        """ Sends the data back as JSON. """
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host: str = '127.0.0.1', port: int = SERVICE_PORT, dp: Datapipe = None):
+    """ Runs the job service until interrupted. """
+    JobHandler.service = JobService(dp)
+    server = ThreadingHTTPServer((host, port), JobHandler)
+    print(f'serving tree jobs on http://{host}:{port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,29 @@
+# Spotify API
+from datapipe import Datapipe
+
+# Constants
+from constants import *
+
+# Miscellaneous
+from threading import Lock
+
+""" Process-wide Datapipe so Trees, Maintain and scripts all share one Spotipy client and token cache. """
+
+_datapipe = None
+_lock = Lock()
+
+
+def get_datapipe(offline: bool = False) -> Datapipe:
+    """ Returns the shared Datapipe, creating it the first time it's asked for.
+        (Spotipy itself still only gets imported and authed once the client is actually used)
+        Raises ValueError if the shared Datapipe was already created with the other offline mode. """
+    global _datapipe
+    with _lock:
+        if _datapipe is None and offline is True:  # offline never auths, so no creds needed
+            _datapipe = Datapipe(None, None, None, SCOPES, offline)
+        elif _datapipe is None:
+            import creds  # only needed once we actually build a live client
+            _datapipe = Datapipe(creds.CLIENT_ID, creds.CLIENT_SECRET, creds.SPOTIPY_REDIRECT_URI, SCOPES, offline)
+        elif _datapipe.offline != offline:
+            raise ValueError(f'shared datapipe was already created with offline={_datapipe.offline}, got offline={offline}')
+        return _datapipe
@@ -1,27 +1,31 @@
 # Spotify API
 from datapipe import Datapipe
-import spotipy
+from session import get_datapipe
 
-# Constants & Creds
+# Constants
 from constants import *
-from creds import *
 
 # Miscellaneous
 from datetime import datetime
+from copy import deepcopy
 
 
 class Trees:
 
-    def __init__(self):
-        # Spotipy is initialized in datapipe because it handles the API/data stuff
-        self.dp = Datapipe(CLIENT_ID, CLIENT_SECRET, SPOTIPY_REDIRECT_URI, SCOPES)
-        self.sp = self.dp.sp  # pull Spotipy instance out incase we need to make direct calls
+    def __init__(self, dp: Datapipe = None):
+        # Spotipy is initialized in datapipe because it handles the API/data stuff (shared across the whole process)
+        self.dp = dp if dp is not None else get_datapipe()
         self.utils = self.dp.utils  # use the same instance of utils in both datapipe and trees
 
+    @property
+    def sp(self):
+        """ Pulls Spotipy instance out of datapipe incase we need to make direct calls (created on first use). """
+        return self.dp.sp
+
     # === SPOTIFY TREES ===
-    def update_playlist_tree(self, id_tree: dict) -> list:
+    def update_playlist_tree(self, id_tree: dict, time_checked_file: str = 'time_checked') -> list:
         """ Combines all the function calls used to update the playlist tree into one function. """
-        last_checked = self.get_time_checked()  # gets time of last program run (last checked)
+        last_checked = self.get_time_checked(time_checked_file)  # gets time of last program run (last checked)
 
         print('finding new songs!')
         print('='*18)
@@ -29,7 +33,7 @@ class Trees:
         new_songs = self.update_playlists(id_tree, last_checked)  # updates tree and returns new songs found
 
         current_time = datetime.utcnow()  # gets current time to update time last checked
-        self.record_time_checked(current_time)  # records the time finished checking to JSON
+        self.record_time_checked(current_time, time_checked_file)  # records the time finished checking to JSON
 
         # TODO: make sure that you can use the same playlist tracks state and that it's not important for it to keep calling
         # cause maybe it's significant for it to keep calling cause it needs the state of the playlist after adding shit during a recursion or something
@@ -53,7 +57,7 @@ class Trees:
         for root, children in forest.items():
             # root is a leaf, so grab the new songs and add to tracks found
             if children is None:
-                leaf_new_tracks, playlist_tracks = self.newly_added_tracks(root, last_checked)
+                leaf_new_tracks, _ = self.newly_added_tracks(root, last_checked)
                 self.utils.extend_nodupes(new_tracks, leaf_new_tracks)
             # else it has children so recurse down first before pushing this playlist's new tracks
             else:
@@ -61,12 +65,12 @@ class Trees:
                 children_new = self.update_playlists(children, last_checked)
 
                 # [2] get new tracks of this node but hold it in a temp first
-                root_new_tracks, playlist_tracks = self.newly_added_tracks(root, last_checked)
-                # we also grabbed playlist tracks as a set for use by push_new_tracks
+                root_new_tracks, present_tracks = self.newly_added_tracks(root, last_checked, children_new)
+                # while streaming we also grabbed which of the children's new tracks are already here for push_new_tracks
 
                 # [3] push children's new tracks to this node
                 if len(children_new) > 0:
-                    self.push_new_tracks(root, playlist_tracks, children_new)
+                    self.push_new_tracks(root, present_tracks, children_new)
 
                 # [4] combine new and child
                 self.utils.extend_nodupes(children_new, root_new_tracks)  # children_new + root_new_tracks
@@ -77,17 +81,21 @@ class Trees:
         return new_tracks
 
     # was: check_new()
-    def newly_added_tracks(self, playlist_id: str, last_checked: datetime) -> tuple[list, set]:
-        """ Finds new tracks in playlist added after the playlist tree was last updated/checked. """
+    def newly_added_tracks(self, playlist_id: str, last_checked: datetime, candidates: list = ()) -> tuple[list, set]:
+        """ Finds new tracks in playlist added after the playlist tree was last updated/checked.
+            Also returns which of the candidate tracks are already in the playlist, so only those get held
+            instead of every track in the playlist. """
         results = self.sp.playlist_tracks(playlist_id)  # first pull of tracks from playlist
-        playlist_tracks = set()  # stores all playlist tracks
+        candidates = set(candidates)
+        present_tracks = set()  # candidates found in the playlist
         new_tracks = []  # defines list for new tracks found
 
         def nested():
             for tr in results['items']:
                 # ignores null IDs this way so that you don't have to filter them later
                 if tr['track']['id'] is not None:
-                    playlist_tracks.add(tr['track']['id'])  # adds track to all playlist tracks
+                    if tr['track']['id'] in candidates:
+                        present_tracks.add(tr['track']['id'])  # candidate is already in the playlist
                     # if the time the track was added is greater than the time last checked
                     if self.utils.convert_from_isostring(tr['added_at']) > last_checked:
                         new_tracks.append(tr['track']['id'])  # then add the track ID to list of new tracks
@@ -97,7 +105,7 @@ class Trees:
             results = self.sp.next(results)
             nested()
 
-        return new_tracks, playlist_tracks
+        return new_tracks, present_tracks
 
     # was: push new
     def push_new_tracks(self, playlist_id: str, playlist_tracks: set, tracks_add: list):
@@ -124,6 +132,32 @@ class Trees:
         else:
             print('new items in sub playlists already in: ' + self.utils.playlist_name_from_id(playlist_id))
 
+    # === TREE BOOTSTRAP ===
+    def bootstrap_tree(self, tree_filename: str, duplicate_policy: str = 'first') -> dict:
+        """
+        Turns a tree of playlist names into the ID and link trees in one pass, creating any playlists that don't exist yet.
+
+        Args:
+            tree_filename (str): Name tree filename (without .json), the ID and link trees get written next to it
+            duplicate_policy (str): How to settle playlists sharing a name ('first', 'last', or 'error')
+
+        Returns:
+            dict: The generated tree of playlist IDs
+        """
+        name_tree = self.utils.read_json(tree_filename)
+        name_id_pairs = self.dp.playlists_name_id_pair(duplicate_policy)  # one fetch of the user's playlists
+
+        # create every playlist in the tree that doesn't exist yet
+        missing = [name for name in dict.fromkeys(self.utils.tree_playlists(name_tree)) if name not in name_id_pairs]
+        if len(missing) > 0:
+            print(f'creating {len(missing)} missing playlists: ' + ', '.join(missing))
+            name_id_pairs.update(self.dp.new_playlists(missing))
+
+        self.utils.convert_name_tree(name_tree, name_id_pairs, tree_filename)  # name tree becomes the ID tree inplace
+        id_tree = deepcopy(name_tree)
+        self.utils.convert_link_tree(name_tree, tree_filename)  # and then the link tree
+        return id_tree
+
     # === TIME RECORDING ===
     def get_time_checked(self, filename: str = 'time_checked') -> datetime:
         """ Returns the time checked from the JSON file. """
@@ -1,6 +1,3 @@
-# Spotify API
-import spotipy
-
 # Other
 from datetime import datetime, timedelta
 from collections.abc import Generator
@@ -11,8 +8,15 @@ import json
 
 class Utils:
 
-    def __init__(self, sp: spotipy.Spotify):
-        self.sp = sp
+    def __init__(self, sp):
+        self._sp = sp  # Spotipy client, or a function that returns one so it can be created lazily
+
+    @property
+    def sp(self):
+        """ Spotipy client, resolved the first time it's needed. """
+        if callable(self._sp):
+            self._sp = self._sp()
+        return self._sp
 
     # === API/AUTH ===
     def generate_scope_string(self, list_of_scopes: list) -> str:
@@ -111,6 +115,25 @@ class Utils:
             sp_tree[new_key] = sp_tree[playlist]  # add new
             sp_tree.pop(playlist)  # pop old
 
+    def tree_playlists(self, sp_tree: dict) -> list[str]:
+        """ Returns every playlist in the tree, parents and leaves (in traversal order). """
+        playlists = []
+        for playlist, children in sp_tree.items():
+            playlists.append(playlist)
+            if children is not None:  # playlist has children so collect them too
+                playlists.extend(self.tree_playlists(children))
+        return playlists
+
+    def tree_leaves(self, sp_tree: dict) -> list[str]:
+        """ Returns every leaf playlist in the tree (in traversal order). """
+        leaves = []
+        for playlist, children in sp_tree.items():
+            if children is None:  # playlist has no children so it's a leaf
+                leaves.append(playlist)
+            else:  # else collect the leaves below it
+                leaves.extend(self.tree_leaves(children))
+        return leaves
+
     # === PLAYLIST NAME/ID CONVERSION ===
     def playlist_name_from_id(self, playlist_id: str) -> str:
         """ Given the playlist ID, returns the playlist name. """
@@ -199,6 +222,10 @@ class Utils:
         for i in range(0, len(track_list), chunk_size):
             yield track_list[i:i + chunk_size]
 
+    def payload_size(self, items: list, snapshot_id: str = None) -> int:
+        """ Returns how many bytes a playlist remove request body with the given items would be. """
+        return len(json.dumps({'tracks': items, 'snapshot_id': snapshot_id}).encode())
+
     # === MISCELLANEOUS ===
     def print_track_names(self, tracks: list):
         """ Given a list of track IDs, prints each track name. """